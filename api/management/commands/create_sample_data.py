@@ -1,13 +1,18 @@
-from random import choice
+import csv
+import io
+import random
+
+from psycopg2 import sql
 
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.db import connection, transaction
 
-from api.models import Notebook, Page, Block, BLOCK_TYPE
+from api.models import Notebook, Page, Block, BlockType
 
 
 User = get_user_model()
+BLOCK_TYPE_VALUES = BlockType.values
 
 
 class Command(BaseCommand):
@@ -19,6 +24,24 @@ class Command(BaseCommand):
             action="store_true",
             help="Skip sample data creation if users already exist",
         )
+        parser.add_argument(
+            "--n-notebooks",
+            type=int,
+            default=1,
+            help="Number of notebooks with pages to create per user",
+        )
+        parser.add_argument(
+            "--n-pages",
+            type=int,
+            default=2,
+            help="Number of pages with blocks to create per notebook",
+        )
+        parser.add_argument(
+            "--n-blocks",
+            type=int,
+            default=5,
+            help="Number of blocks to create per page",
+        )
 
     @transaction.atomic
     def handle(self, *args, **options):
@@ -39,20 +62,50 @@ class Command(BaseCommand):
             self.stdout.write(f"Created user {username} with password {username}")
 
         self.stdout.write("Creating notebooks, pages and blocks...")
+        # The order arrays of users/notebooks are extended by the statement-level
+        # insert triggers, once per `bulk_create` batch. Blocks are copied with
+        # their positions.
+        notebooks, pages, blocks = [], [], []
         for user in users:
-            Notebook.objects.create(user=user, title=f"Notebook without pages")
-            notebook = Notebook.objects.create(user=user, title="My Notebook")
+            notebooks.append(Notebook(user=user, title="Notebook without pages"))
+
+            for i in range(1, options["n_notebooks"] + 1):
+                notebook = Notebook(user=user, title=f"My Notebook {i}")
+                notebooks.append(notebook)
 
-            for j in range(1, 3):
-                page = Page.objects.create(notebook=notebook, title=f"Page {j}")
+                for j in range(1, options["n_pages"] + 1):
+                    page = Page(notebook=notebook, title=f"Page {j}")
+                    pages.append(page)
 
-                for k in range(1, 6):
-                    block_type = choice([b[0] for b in BLOCK_TYPE])
-                    content = f"Lorem Ipsum {k}"
-                    Block.objects.create(
-                        page=page, block_type=block_type, content=content
+                    block_types = random.choices(BLOCK_TYPE_VALUES, k=options["n_blocks"])
+                    blocks.extend(
+                        (page.pk, block_type, f"Lorem Ipsum {k}", None, k)
+                        for k, block_type in enumerate(block_types, 1)
+                    )
+                else:
+                    pages.append(
+                        Page(notebook=notebook, title="Page without blocks")
                     )
-            else:
-                Page.objects.create(notebook=notebook, title="Page without blocks")
+
+        Notebook.objects.bulk_create(notebooks, batch_size=1000)
+        Page.objects.bulk_create(pages, batch_size=1000)
+        self.copy_blocks(blocks)
 
         self.stdout.write("Sample data created successfully!")
+
+    def copy_blocks(self, blocks):
+        # Blocks make up most of the sample data,
+        # stream them to Postgres with COPY instead of multi-row INSERTs.
+        buf = io.StringIO()
+        csv.writer(buf).writerows(blocks)
+        buf.seek(0)
+
+        columns = ["page_id", "block_type", "content", "metadata", "position"]
+        with connection.cursor() as cur:
+            cur.copy_expert(
+                sql.SQL("COPY {table} ({columns}) FROM STDIN WITH CSV").format(
+                    table=sql.Identifier(Block._meta.db_table),
+                    columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+                ),
+                buf,
+            )
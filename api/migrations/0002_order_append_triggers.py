@@ -0,0 +1,78 @@
+from django.db import migrations
+
+
+# Statement-level triggers that append newly inserted notebooks/pages/blocks
+# to their parent's order array. A multi-row INSERT (e.g. `bulk_create`)
+# fires each trigger once and updates every affected parent in one UPDATE.
+ORDER_APPEND_TRIGGERS = [
+    # (trigger/function name, child table, transition table, parent table, parent fk, order column)
+    (
+        "append_notebook_order",
+        "api_notebook",
+        "new_notebooks",
+        "api_user",
+        "user_id",
+        "custom_notebook_order",
+    ),
+    (
+        "append_page_order",
+        "api_page",
+        "new_pages",
+        "api_notebook",
+        "notebook_id",
+        "custom_page_order",
+    ),
+    (
+        "append_block_order",
+        "api_block",
+        "new_blocks",
+        "api_page",
+        "page_id",
+        "block_order",
+    ),
+]
+
+
+def create_trigger_sql(name, table, new_table, parent_table, parent_fk, column):
+    return f"""
+        CREATE FUNCTION {name}() RETURNS trigger AS $$
+        BEGIN
+            UPDATE {parent_table} p
+            SET {column} = p.{column} || n.ids
+            FROM (
+                SELECT {parent_fk}, ARRAY_AGG(id) AS ids
+                FROM {new_table}
+                GROUP BY {parent_fk}
+            ) n
+            WHERE p.id = n.{parent_fk};
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER {name}
+        AFTER INSERT ON {table}
+        REFERENCING NEW TABLE AS {new_table}
+        FOR EACH STATEMENT EXECUTE FUNCTION {name}();
+    """
+
+
+def drop_trigger_sql(name, table, *args):
+    return f"""
+        DROP TRIGGER IF EXISTS {name} ON {table};
+        DROP FUNCTION IF EXISTS {name}();
+    """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=create_trigger_sql(*trigger),
+            reverse_sql=drop_trigger_sql(*trigger),
+        )
+        for trigger in ORDER_APPEND_TRIGGERS
+    ]
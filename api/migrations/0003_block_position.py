@@ -0,0 +1,96 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+
+order_append_triggers = import_module("api.migrations.0002_order_append_triggers")
+APPEND_BLOCK_ORDER_TRIGGER = next(
+    trigger
+    for trigger in order_append_triggers.ORDER_APPEND_TRIGGERS
+    if trigger[0] == "append_block_order"
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_order_append_triggers"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="block",
+            name="position",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE api_block b
+                SET position = o.idx
+                FROM api_page p, UNNEST(p.block_order) WITH ORDINALITY AS o(id, idx)
+                WHERE b.id = o.id AND b.page_id = p.id;
+
+                UPDATE api_block b
+                SET position = o.idx
+                FROM (
+                    SELECT
+                        id,
+                        COALESCE(MAX(position) OVER (PARTITION BY page_id), 0)
+                            + ROW_NUMBER() OVER (PARTITION BY page_id ORDER BY id) AS idx
+                    FROM api_block
+                ) o
+                WHERE b.id = o.id AND b.position IS NULL;
+            """,
+            reverse_sql="""
+                UPDATE api_page p
+                SET block_order = COALESCE(
+                    (SELECT ARRAY_AGG(b.id ORDER BY b.position) FROM api_block b WHERE b.page_id = p.id),
+                    '{}'
+                );
+            """,
+        ),
+        migrations.AlterField(
+            model_name="block",
+            name="position",
+            field=models.FloatField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="block",
+            index=models.Index(
+                fields=["page", "position"], name="api_block_page_id_aa2343_idx"
+            ),
+        ),
+        migrations.RunSQL(
+            sql=order_append_triggers.drop_trigger_sql(*APPEND_BLOCK_ORDER_TRIGGER),
+            reverse_sql=order_append_triggers.create_trigger_sql(
+                *APPEND_BLOCK_ORDER_TRIGGER
+            ),
+        ),
+        # Blocks inserted without a position are appended to the end of their page.
+        # Later rows of a multi-row INSERT/COPY see the positions of the earlier ones.
+        migrations.RunSQL(
+            sql="""
+                CREATE FUNCTION set_block_position() RETURNS trigger AS $$
+                BEGIN
+                    SELECT COALESCE(MAX(position), 0) + 1 INTO NEW.position
+                    FROM api_block
+                    WHERE page_id = NEW.page_id;
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql;
+
+                CREATE TRIGGER set_block_position
+                BEFORE INSERT ON api_block
+                FOR EACH ROW WHEN (NEW.position IS NULL)
+                EXECUTE FUNCTION set_block_position();
+            """,
+            reverse_sql="""
+                DROP TRIGGER IF EXISTS set_block_position ON api_block;
+                DROP FUNCTION IF EXISTS set_block_position();
+            """,
+        ),
+        migrations.RemoveField(
+            model_name="page",
+            name="block_order",
+        ),
+    ]
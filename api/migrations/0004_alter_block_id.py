@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_block_position"),
+    ]
+
+    operations = [
+        # uuid can't be cast to bigint, replace the column instead.
+        # Nothing references blocks by id, existing blocks get new ids.
+        migrations.RunSQL(
+            sql="""
+                ALTER TABLE api_block DROP COLUMN id;
+                ALTER TABLE api_block
+                ADD COLUMN id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY;
+            """,
+            reverse_sql="""
+                ALTER TABLE api_block DROP COLUMN id;
+                ALTER TABLE api_block
+                ADD COLUMN id uuid NOT NULL DEFAULT gen_random_uuid() PRIMARY KEY;
+                ALTER TABLE api_block ALTER COLUMN id DROP DEFAULT;
+            """,
+            state_operations=[
+                migrations.AlterField(
+                    model_name="block",
+                    name="id",
+                    field=models.BigAutoField(primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
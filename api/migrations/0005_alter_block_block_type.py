@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+
+BLOCK_TYPES = [
+    "h1", "h2", "h3", "p", "code", "ol", "ul", "todo", "quote", "br", "empty"
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_alter_block_id"),
+    ]
+
+    operations = [
+        # Replace the names by their numbers first,
+        # so that the column type change can simply cast them to smallint.
+        migrations.RunSQL(
+            sql=[
+                (
+                    "UPDATE api_block"
+                    " SET block_type = ARRAY_POSITION(%s::text[], block_type)",
+                    [BLOCK_TYPES],
+                )
+            ],
+            reverse_sql=[
+                (
+                    "UPDATE api_block SET block_type = (%s::text[])[block_type::int]",
+                    [BLOCK_TYPES],
+                )
+            ],
+        ),
+        migrations.AlterField(
+            model_name="block",
+            name="block_type",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (1, "Heading 1"),
+                    (2, "Heading 2"),
+                    (3, "Heading 3"),
+                    (4, "Paragraph"),
+                    (5, "Code Block"),
+                    (6, "Ordered List"),
+                    (7, "Unordered List"),
+                    (8, "To-Do List"),
+                    (9, "Quote Block"),
+                    (10, "Divider Line"),
+                    (11, "Empty Line"),
+                ]
+            ),
+        ),
+    ]
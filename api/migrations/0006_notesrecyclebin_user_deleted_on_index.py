@@ -0,0 +1,19 @@
+# Generated by Django 4.1.13 on 2026-10-15 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_alter_block_block_type"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notesrecyclebin",
+            index=models.Index(
+                fields=["user", "deleted_on"], name="api_notesre_user_id_5fef93_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_notesrecyclebin_user_deleted_on_index"),
+    ]
+
+    operations = [
+        # Lock the page row before reading MAX(position), so that concurrent
+        # inserts on the same page are appended one after the other instead of
+        # both getting the same position.
+        migrations.RunSQL(
+            sql="""
+                CREATE OR REPLACE FUNCTION set_block_position() RETURNS trigger AS $$
+                BEGIN
+                    PERFORM 1 FROM api_page WHERE id = NEW.page_id FOR NO KEY UPDATE;
+                    SELECT COALESCE(MAX(position), 0) + 1 INTO NEW.position
+                    FROM api_block
+                    WHERE page_id = NEW.page_id;
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql;
+            """,
+            reverse_sql="""
+                CREATE OR REPLACE FUNCTION set_block_position() RETURNS trigger AS $$
+                BEGIN
+                    SELECT COALESCE(MAX(position), 0) + 1 INTO NEW.position
+                    FROM api_block
+                    WHERE page_id = NEW.page_id;
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql;
+            """,
+        ),
+    ]
@@ -1,20 +1,23 @@
+import functools
 import uuid
 
+from psycopg2 import sql
+
 from django.conf import settings
 from django.db import models
 from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 from django.contrib.postgres import fields as pg_models
 
 
-# TODO: Use psycopg2.sql for all raw SQL queries
-
-
 class User(AbstractUser):
     custom_notebook_order = pg_models.ArrayField(
         models.UUIDField(), default=list, editable=False
     )
     # To store user-defined notebook ordering.
+    # New notebooks are appended by the `append_notebook_order` trigger(see migration 0002).
     # Reordering is easy compared to managing an additional "ordering" column in Notebook model.
     # Ordering notebooks by title/created/updated should be performed on the client side.
     # Only the order and filter settings are stored on the server side, in `preferences` column.
@@ -24,11 +27,28 @@ class User(AbstractUser):
 
     def reposition_notebook(self, notebook_id, *, position=None, after=None):
         with connection.cursor() as cur:
-            reposition_array_element(
+            return reposition_array_element(
                 cur, self, "custom_notebook_order", notebook_id, position, after
             )
 
 
+class OrderedChildMixin:
+    # For models whose order is stored in an array column of the parent.
+    # Deleting an instance removes it from the parent's array.
+    parent_field = None
+    order_column = None
+
+    def delete(self, *args, **kwargs):
+        parent_id = getattr(self, self._meta.get_field(self.parent_field).attname)
+        # No savepoint, callers like `perform_destroy` already run inside a transaction
+        with transaction.atomic(savepoint=False), connection.cursor() as cur:
+            cur.execute(
+                remove_from_order_sql(type(self)),
+                {"element": self.pk, "parent": parent_id},
+            )
+            super().delete(*args, **kwargs)
+
+
 class TimestampedModel(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
@@ -46,9 +66,28 @@ class TimestampedModel(models.Model):
 # 1. Both the table and the index consumes more space - 8 bytes(bigint) vs 16 bytes
 # 2. Slightly lower read performance compared to bigint/int8 - https://www.cybertec-postgresql.com/en/int4-vs-int8-vs-uuid-vs-numeric-performance-on-bigger-joins/
 # 3. Larger indexes can worsen write performance
+# Blocks use bigint ids instead - it's the largest table, so the disadvantages weigh
+# the most there, and blocks never appear in urls(advantage #3).
+
+
+# The API only ever works on the requesting user's notebooks/pages/blocks,
+# `for_user` keeps that scoping in one place per model.
+class NotebookQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(user=user)
+
+    def in_user_order(self):
+        # Ordered by the position in the owner's `custom_notebook_order`
+        return self.order_by(
+            models.Func(
+                models.F("user__custom_notebook_order"),
+                models.F("id"),
+                function="ARRAY_POSITION",
+            )
+        )
 
 
-class Notebook(TimestampedModel):
+class Notebook(OrderedChildMixin, TimestampedModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notebooks"
@@ -59,121 +98,103 @@ class Notebook(TimestampedModel):
     )
     # To store user-defined page ordering.
     # See `User` preferences field
+    # New pages are appended by the `append_page_order` trigger(see migration 0002).
 
     preferences = models.JSONField(null=True)
     # For storing description, page order/filters settings, stylistic settings(e.g., bg color) and
     # UI behaviour settings(show/hide description, list/thumbnail view, etc).
     # May become a dumping groud for anything that can't be stored in other columns.
 
-    def save(self, *args, **kwargs):
-        with transaction.atomic():
-            # https://docs.djangoproject.com/en/4.1/ref/models/instances/#django.db.models.Model._state:
-            if self._state.adding:
-                with connection.cursor() as cur:
-                    cur.execute(
-                        f"""
-                        UPDATE {self.user._meta.db_table}
-                        SET custom_notebook_order = ARRAY_APPEND(custom_notebook_order, %(notebook_id)s)
-                        WHERE {self.user._meta.pk.column} = %(user_id)s
-                        """,
-                        {"notebook_id": self.pk, "user_id": self.user.pk},
-                    )
-            super().save(*args, **kwargs)
+    objects = NotebookQuerySet.as_manager()
 
-    def delete(self, *args, **kwargs):
-        with connection.cursor() as cur:
-            cur.execute(
-                f"""
-               UPDATE {self.user._meta.db_table}
-               SET custom_notebook_order = ARRAY_REMOVE(custom_notebook_order, %(notebook_id)s)
-               WHERE {self.user._meta.pk.column} = %(user_id)s
-               """,
-                {"notebook_id": self.pk, "user_id": self.user.pk},
-            )
-            super().delete(*args, **kwargs)
+    parent_field = "user"
+    order_column = "custom_notebook_order"
 
     def reposition_page(self, page_id, *, position=None, after=None):
         with connection.cursor() as cur:
-            reposition_array_element(
+            return reposition_array_element(
                 cur, self, "custom_page_order", page_id, position, after
             )
 
+    @classmethod
+    def move_pages(cls, source_id, destination_id, page_ids):
+        # Pages that aren't in the source notebook are left where they are.
+        with connection.cursor() as cur:
+            cur.execute(
+                MOVE_PAGES_SQL,
+                {"source": source_id, "destination": destination_id, "pages": page_ids},
+            )
+
     def __repr__(self):
         return f"Notebook(user={self.user.username}, pk={self.pk}, title={self.title})"
 
 
-class Page(TimestampedModel):
+class PageQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(notebook__user=user)
+
+
+class Page(OrderedChildMixin, TimestampedModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
     notebook = models.ForeignKey(
         Notebook, on_delete=models.CASCADE, related_name="pages"
     )
     title = models.CharField(max_length=100)
 
-    block_order = pg_models.ArrayField(models.UUIDField(), default=list, editable=False)
-    # Using an ArrayField provides implicit ordering of blocks.
-    # Blocks always follow user-defined order.
-
     preferences = models.JSONField(null=True)
     # similar to Notebook's field
 
-    def save(self, *args, **kwargs):
-        with transaction.atomic():
-            if self._state.adding:
-                with connection.cursor() as cur:
-                    cur.execute(
-                        f"""
-                        UPDATE {self.notebook._meta.db_table}
-                        SET custom_page_order = ARRAY_APPEND(custom_page_order, %(page_id)s)
-                        WHERE {self.notebook._meta.pk.column} = %(notebook_id)s""",
-                        {
-                            "notebook_id": self.notebook.pk,
-                            "page_id": self.pk,
-                        },
-                    )
-            super().save(*args, **kwargs)
+    objects = PageQuerySet.as_manager()
 
-    def delete(self, *args, **kwargs):
-        with connection.cursor() as cur:
-            cur.execute(
-                f"""
-               UPDATE {self.notebook._meta.db_table}
-               SET custom_page_order = ARRAY_REMOVE(custom_page_order, %(page_id)s)
-               WHERE {self.notebook._meta.pk.column} = %(notebook_id)s
-               """,
-                {
-                    "notebook_id": self.notebook.pk,
-                    "page_id": self.pk,
-                },
-            )
-            super().delete(*args, **kwargs)
+    parent_field = "notebook"
+    order_column = "custom_page_order"
 
-    def reposition_block(self, block_id, *, position=None, after=None):
+    def block_ids(self):
+        return self.blocks.in_page_order().values_list("id", flat=True)
+
+    def reposition_block(self, block_id, *, position=None, after=None, user_id=None):
+        # `user_id` defaults to the page's owner, pass it to skip loading the notebook
+        if user_id is None:
+            user_id = self.notebook.user_id
         with connection.cursor() as cur:
-            reposition_array_element(cur, self, "block_order", block_id, position, after)
+            return reposition_block(cur, self.pk, user_id, block_id, position, after)
 
     def __repr__(self):
         return f"Page(notebook={self.notebook.pk}, pk={self.pk}, title={self.title})"
 
 
-BLOCK_TYPE = [  # Non-exhaustive list
-    ("h1", "Heading 1"),
-    ("h2", "Heading 2"),
-    ("h3", "Heading 3"),
-    ("p", "Paragraph"),
-    ("code", "Code Block"),
-    ("ol", "Ordered List"),
-    ("ul", "Unordered List"),
-    ("todo", "To-Do List"),
-    ("quote", "Quote Block"),
-    ("br", "Divider Line"),
-    ("empty", "Empty Line"),
-]
+class BlockType(models.IntegerChoices):  # Non-exhaustive list
+    H1 = 1, "Heading 1"
+    H2 = 2, "Heading 2"
+    H3 = 3, "Heading 3"
+    P = 4, "Paragraph"
+    CODE = 5, "Code Block"
+    OL = 6, "Ordered List"
+    UL = 7, "Unordered List"
+    TODO = 8, "To-Do List"
+    QUOTE = 9, "Quote Block"
+    BR = 10, "Divider Line"
+    EMPTY = 11, "Empty Line"
+
+
+# Block types are stored as a smallint (2 bytes vs. varlena header + text length),
+# but the API keeps using the short names, e.g. "h1" for `BlockType.H1`.
+BLOCK_TYPE = [(t.name.lower(), t.label) for t in BlockType]
+
+
+class BlockQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(page__notebook__user=user)
+
+    def in_page_order(self):
+        # `id` breaks ties, e.g. between blocks copied in with the same position
+        return self.order_by("position", "id")
 
 
 class Block(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.BigAutoField(primary_key=True)
     page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name="blocks")
-    block_type = models.CharField(max_length=50, choices=BLOCK_TYPE)
+    block_type = models.PositiveSmallIntegerField(choices=BlockType.choices)
 
     content = models.TextField()
     # In the current implementation, whenever there's a change in the text,
@@ -195,38 +216,52 @@ class Block(models.Model):
     # and display settings(such as size, thumbnail visibility) for
     # embedded blocks(images, videos, docs, etc.)
 
-    def save(self, *args, **kwargs):
-        with transaction.atomic():
-            if self._state.adding:
-                with connection.cursor() as cur:
-                    cur.execute(
-                        f"""
-                        UPDATE {self.page._meta.db_table}
-                        SET block_order = ARRAY_APPEND(block_order, %(block_id)s)
-                        WHERE {self.page._meta.pk.column} = %(page_id)s""",
-                        {
-                            "page_id": self.page.pk,
-                            "block_id": self.pk,
-                        },
-                    )
-            super().save(*args, **kwargs)
+    position = models.FloatField(editable=False)
+    # Blocks always follow user-defined order, `position` is the block's place within the page.
+    # Unlike an array of block ids on Page, which is rewritten on every insert or move,
+    # a move only updates the moved block's row - its new position is the midpoint
+    # between its new neighbours (fractional indexing).
+    # New blocks are appended by the `set_block_position` trigger(see migrations 0003, 0007).
 
-    def delete(self, *args, **kwargs):
-        with connection.cursor() as cur:
-            cur.execute(
-                f"""
-               UPDATE {self.page._meta.db_table}
-               SET block_order = ARRAY_REMOVE(block_order, %(block_id)s)
-               WHERE {self.page._meta.pk.column} = %(page_id)s
-               """,
-                {"page_id": self.page.pk, "block_id": self.pk},
-            )
-            super().delete(*args, **kwargs)
+    objects = BlockQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["page", "position"])]
 
     def __repr__(self):
         return f"Block(page={self.page.pk}, pk={self.pk}, content={self.content})"
 
 
+RECYCLE_BIN_PAGE_LIST_SQL = """
+    CASE item_type
+        WHEN 'notebook' THEN (
+            SELECT COALESCE(
+                JSONB_AGG(
+                    JSONB_BUILD_OBJECT('id', p.value -> 'id', 'title', p.value -> 'title')
+                    ORDER BY p.idx
+                ),
+                '[]'
+            )
+            FROM JSONB_ARRAY_ELEMENTS(item -> 'page_items') WITH ORDINALITY AS p(value, idx)
+        )
+        WHEN 'page' THEN JSONB_BUILD_ARRAY(
+            JSONB_BUILD_OBJECT('id', item -> 'id', 'title', item -> 'title')
+        )
+    END
+"""
+
+
+class NotesRecycleBinQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(user=user)
+
+    def with_page_list(self):
+        # Let Postgres pick out the page ids/titles instead of
+        # loading and decoding the entire `item` json
+        page_list = RawSQL(RECYCLE_BIN_PAGE_LIST_SQL, [], output_field=models.JSONField())
+        return self.defer("item").annotate(page_list=page_list)
+
+
 class NotesRecycleBin(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -243,6 +278,44 @@ class NotesRecycleBin(models.Model):
 
     deleted_on = models.DateTimeField(auto_now_add=True)
 
+    objects = NotesRecycleBinQuerySet.as_manager()
+
+    class Meta:
+        # Serves the recycle bin list, a user's items in deletion order
+        indexes = [models.Index(fields=["user", "deleted_on"])]
+
+    @classmethod
+    def archive_notebook(cls, notebook):
+        return cls.archive_notebooks([notebook.pk])[0]
+
+    @classmethod
+    def archive_page(cls, page):
+        return cls.archive_pages([page.pk])[0]
+
+    # The whole {notebook -> pages -> blocks} json is built by Postgres
+    # and written in the same statement, no rows are loaded into Python.
+    # Any number of notebooks/pages are archived with a single INSERT ... SELECT.
+    @classmethod
+    def archive_notebooks(cls, notebook_ids):
+        return cls._archive(ARCHIVE_NOTEBOOK_SQL, {"notebook_ids": list(notebook_ids)})
+
+    @classmethod
+    def archive_pages(cls, page_ids):
+        return cls._archive(ARCHIVE_PAGE_SQL, {"page_ids": list(page_ids)})
+
+    @classmethod
+    def _archive(cls, query, params):
+        with connection.cursor() as cur:
+            cur.execute(
+                query,
+                {
+                    **params,
+                    "deleted_on": timezone.now(),
+                    "block_types": [t[0] for t in BLOCK_TYPE],
+                },
+            )
+            return [row[0] for row in cur.fetchall()]
+
     def __repr__(self):
         return f"NotesRecycleBin(user={self.user.username}, item_type={self.item_type})"
 
@@ -257,45 +330,390 @@ class NotesRecycleBin(models.Model):
 #    Some kind of queueing mechanism can be used to improve "Delete" operation UX.
 
 
+# Raw SQL is composed with psycopg2.sql once, at import time, so that table and
+# column names are always quoted as identifiers.
+
+REMOVE_ARRAY_ELEMENT_SQL = sql.SQL(
+    """
+    UPDATE {table}
+    SET {column} = ARRAY_REMOVE({column}, %(element)s)
+    WHERE {pk} = %(parent)s
+    """
+)
+
+
+@functools.lru_cache(maxsize=None)
+def remove_from_order_sql(model):
+    parent = model._meta.get_field(model.parent_field).related_model
+    return REMOVE_ARRAY_ELEMENT_SQL.format(
+        table=sql.Identifier(parent._meta.db_table),
+        column=sql.Identifier(model.order_column),
+        pk=sql.Identifier(parent._meta.pk.column),
+    )
+
+
+# Elements that aren't in the array are ignored rather than added to it.
+# For models with a `parent_field` the row must also belong to the given parent,
+# so that e.g. a notebook can be repositioned without loading it first.
+REPOSITION_SQL = {
+    "top": sql.SQL(
+        """
+        UPDATE {table}
+        SET {column} = ARRAY_PREPEND(%(element)s::uuid, ARRAY_REMOVE({column}, %(element)s::uuid))
+        WHERE {pk} = %(pk)s {scope} AND {column} @> ARRAY[%(element)s::uuid]
+        """
+    ),
+    "bottom": sql.SQL(
+        """
+        UPDATE {table}
+        SET {column} = ARRAY_APPEND(ARRAY_REMOVE({column}, %(element)s::uuid), %(element)s::uuid)
+        WHERE {pk} = %(pk)s {scope} AND {column} @> ARRAY[%(element)s::uuid]
+        """
+    ),
+    # Remove the element and look up the `after` element only once.
+    # If either element isn't in the array, the row is left untouched.
+    "after": sql.SQL(
+        """
+        WITH removed AS (
+            SELECT ARRAY_REMOVE({column}, %(element)s::uuid) AS arr
+            FROM {table}
+            WHERE {pk} = %(pk)s {scope} AND {column} @> ARRAY[%(element)s::uuid]
+        ),
+        anchor AS (
+            SELECT arr, ARRAY_POSITION(arr, %(after)s::uuid) AS idx FROM removed
+        )
+        UPDATE {table}
+        SET {column} = anchor.arr[:anchor.idx] || ARRAY[%(element)s::uuid] || anchor.arr[anchor.idx + 1:]
+        FROM anchor
+        WHERE {pk} = %(pk)s AND anchor.idx IS NOT NULL
+        """
+    ),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def reposition_sql(model, array_column, kind):
+    # Composed once per (model, array column, kind) and reused afterwards,
+    # instead of resolving `_meta` and re-composing the SQL on every call.
+    scope = sql.SQL("")
+    if getattr(model, "parent_field", None):
+        parent_column = model._meta.get_field(model.parent_field).column
+        scope = sql.SQL("AND {} = %(parent)s").format(sql.Identifier(parent_column))
+    return REPOSITION_SQL[kind].format(
+        table=sql.Identifier(model._meta.db_table),
+        column=sql.Identifier(array_column),
+        pk=sql.Identifier(model._meta.pk.column),
+        scope=scope,
+    )
+
+
 def reposition_array_element(cur, instance, array_column, element, position=None, after=None):
-    # TODO: Check the element(and the 'after' element) exist
-    if position == "top":
-        cur.execute(
-            f"""
-            UPDATE {instance._meta.db_table}
-            SET {array_column} = ARRAY_PREPEND(%(element)s::uuid, ARRAY_REMOVE({array_column}, %(element)s::uuid))
-            WHERE {instance._meta.pk.column} = %(pk)s
-            """,
-            {"element": element, "pk": instance.pk},
+    if position in ("top", "bottom"):
+        kind = position
+    elif after:
+        kind = "after"
+    else:
+        raise ValueError(
+            "At least one of `position`(value=top|bottom) or `after`(uuid) is expected"
         )
-    elif position == "bottom":
-        cur.execute(
-            f"""
-            UPDATE {instance._meta.db_table}
-            SET {array_column} = ARRAY_APPEND(ARRAY_REMOVE({array_column}, %(element)s::uuid), %(element)s::uuid)
-            WHERE {instance._meta.pk.column} = %(pk)s
-            """,
-            {"element": element, "pk": instance.pk},
+    params = {"element": element, "after": after, "pk": instance.pk}
+    if getattr(instance, "parent_field", None):
+        field = instance._meta.get_field(instance.parent_field)
+        params["parent"] = getattr(instance, field.attname)
+    cur.execute(reposition_sql(type(instance), array_column, kind), params)
+    # Whether the element was repositioned, i.e. the parent row matched
+    return cur.rowcount > 0
+
+
+# Timestamps are written the way DRF's DateTimeField renders them(UTC, "Z" suffix,
+# no fraction for whole seconds), the format deleted items were archived in
+# before the json moved to Postgres.
+def json_datetime_sql(column):
+    return sql.SQL(
+        """
+        TO_CHAR(
+            {column} AT TIME ZONE 'UTC',
+            CASE WHEN DATE_TRUNC('second', {column}) = {column}
+                THEN 'YYYY-MM-DD"T"HH24:MI:SS"Z"'
+                ELSE 'YYYY-MM-DD"T"HH24:MI:SS.US"Z"'
+            END
         )
-    elif after:
-        cur.execute(
-            f"""
-            UPDATE
-                { instance._meta.db_table }
-            SET
-                { array_column } = ARRAY_CAT(
-                    (ARRAY_REMOVE({ array_column }, %(element)s)) [:array_position(ARRAY_REMOVE({array_column}, %(element)s), %(after)s)],
-                    ARRAY_CAT(
-                        ARRAY [%(element)s],
-                        (ARRAY_REMOVE({ array_column }, %(element)s)) [array_position(ARRAY_REMOVE({array_column}, %(element)s), %(after)s)+1:]
-                    )
+        """
+    ).format(column=sql.SQL(column))
+
+
+# A page and its blocks in the recycle bin's json format, shared by the
+# notebook and page archives. Expects the page as `p`.
+ARCHIVE_PAGE_ITEM_SQL = sql.SQL(
+    """
+    JSONB_BUILD_OBJECT(
+        'id', p.id,
+        'notebook', p.notebook_id,
+        'title', p.title,
+        'created', {created},
+        'updated', {updated},
+        'preferences', p.preferences,
+        'blocks', COALESCE(blocks.ids, '[]'),
+        'block_items', COALESCE(blocks.items, '[]')
+    )
+    """
+).format(
+    created=json_datetime_sql("p.created"), updated=json_datetime_sql("p.updated")
+)
+
+ARCHIVE_PAGE_BLOCKS_SQL = sql.SQL(
+    """
+    LEFT JOIN LATERAL (
+        SELECT
+            JSONB_AGG(b.id ORDER BY b.position, b.id) AS ids,
+            JSONB_AGG(
+                JSONB_BUILD_OBJECT(
+                    'id', b.id,
+                    'block_type', (%(block_types)s::text[])[b.block_type],
+                    'content', b.content,
+                    'metadata', b.metadata
                 )
-            WHERE
-            { instance._meta.pk.column } = %(pk)s
-            """,
-            {"element": element, "after": after, "pk": instance.pk},
+                ORDER BY b.position, b.id
+            ) AS items
+        FROM {block} b
+        WHERE b.page_id = p.id
+    ) blocks ON TRUE
+    """
+).format(block=sql.Identifier(Block._meta.db_table))
+
+ARCHIVE_NOTEBOOK_SQL = sql.SQL(
+    """
+    INSERT INTO {recycle_bin} (id, user_id, notebook_id, notebook_title, item_type, item, deleted_on)
+    SELECT
+        gen_random_uuid(), n.user_id, n.id, n.title, 'notebook',
+        JSONB_BUILD_OBJECT(
+            'id', n.id,
+            'title', n.title,
+            'created', {notebook_created},
+            'updated', {notebook_updated},
+            'preferences', n.preferences,
+            'pages', COALESCE(pages.list, '[]'),
+            'page_items', COALESCE(pages.items, '[]')
+        ),
+        %(deleted_on)s
+    FROM {notebook} n
+    LEFT JOIN LATERAL (
+        SELECT
+            JSONB_AGG(
+                JSONB_BUILD_OBJECT('id', p.id, 'title', p.title, 'updated', {page_updated})
+                ORDER BY ARRAY_POSITION(n.custom_page_order, p.id)
+            ) AS list,
+            JSONB_AGG(
+                {page_item}
+                ORDER BY ARRAY_POSITION(n.custom_page_order, p.id)
+            ) AS items
+        FROM {page} p
+        {page_blocks}
+        WHERE p.notebook_id = n.id
+    ) pages ON TRUE
+    WHERE n.id = ANY(%(notebook_ids)s::uuid[])
+    RETURNING id
+    """
+).format(
+    recycle_bin=sql.Identifier(NotesRecycleBin._meta.db_table),
+    notebook=sql.Identifier(Notebook._meta.db_table),
+    page=sql.Identifier(Page._meta.db_table),
+    page_item=ARCHIVE_PAGE_ITEM_SQL,
+    page_blocks=ARCHIVE_PAGE_BLOCKS_SQL,
+    notebook_created=json_datetime_sql("n.created"),
+    notebook_updated=json_datetime_sql("n.updated"),
+    page_updated=json_datetime_sql("p.updated"),
+)
+
+ARCHIVE_PAGE_SQL = sql.SQL(
+    """
+    INSERT INTO {recycle_bin} (id, user_id, notebook_id, notebook_title, item_type, item, deleted_on)
+    SELECT gen_random_uuid(), n.user_id, n.id, n.title, 'page', {page_item}, %(deleted_on)s
+    FROM {page} p
+    JOIN {notebook} n ON n.id = p.notebook_id
+    {page_blocks}
+    WHERE p.id = ANY(%(page_ids)s::uuid[])
+    RETURNING id
+    """
+).format(
+    recycle_bin=sql.Identifier(NotesRecycleBin._meta.db_table),
+    notebook=sql.Identifier(Notebook._meta.db_table),
+    page=sql.Identifier(Page._meta.db_table),
+    page_item=ARCHIVE_PAGE_ITEM_SQL,
+    page_blocks=ARCHIVE_PAGE_BLOCKS_SQL,
+)
+
+# Moving pages between notebooks is a single statement, the page rows and both
+# notebooks' order arrays are updated together. The moved pages keep the order
+# they were given in and are appended to the destination notebook.
+MOVE_PAGES_SQL = sql.SQL(
+    """
+    WITH moved AS (
+        UPDATE {page}
+        SET notebook_id = %(destination)s
+        WHERE id = ANY(%(pages)s::uuid[]) AND notebook_id = %(source)s
+        RETURNING id
+    ),
+    moved_order AS (
+        SELECT ARRAY(
+            SELECT p.id
+            FROM UNNEST(%(pages)s::uuid[]) WITH ORDINALITY AS p(id, idx)
+            WHERE p.id IN (SELECT id FROM moved)
+            ORDER BY p.idx
+        ) AS ids
+    ),
+    source AS (
+        UPDATE {notebook} n
+        SET custom_page_order = ARRAY(
+            SELECT o.id
+            FROM UNNEST(n.custom_page_order) WITH ORDINALITY AS o(id, idx)
+            WHERE NOT o.id = ANY(moved_order.ids)
+            ORDER BY o.idx
+        )
+        FROM moved_order
+        WHERE n.id = %(source)s
+    )
+    UPDATE {notebook} n
+    SET custom_page_order = n.custom_page_order || moved_order.ids
+    FROM moved_order
+    WHERE n.id = %(destination)s
+    """
+).format(
+    notebook=sql.Identifier(Notebook._meta.db_table),
+    page=sql.Identifier(Page._meta.db_table),
+)
+
+BLOCK_SQL_IDENTIFIERS = {
+    "table": sql.Identifier(Block._meta.db_table),
+    "page": sql.Identifier(Block._meta.get_field("page").column),
+    # Blocks are only moved on pages of the given user,
+    # checked in the same statement instead of loading the page first.
+    "page_owned": sql.SQL(
+        """
+        EXISTS (
+            SELECT 1
+            FROM {page_table} p JOIN {notebook_table} n ON n.id = p.notebook_id
+            WHERE p.id = %(page)s AND n.user_id = %(user)s
         )
+        """
+    ).format(
+        page_table=sql.Identifier(Page._meta.db_table),
+        notebook_table=sql.Identifier(Notebook._meta.db_table),
+    ),
+}
+
+REPOSITION_BLOCK_SQL = {
+    "top": sql.SQL(
+        """
+        UPDATE {table}
+        SET position = (SELECT MIN(position) FROM {table} WHERE {page} = %(page)s) - 1
+        WHERE id = %(element)s AND {page} = %(page)s AND {page_owned}
+        """
+    ).format(**BLOCK_SQL_IDENTIFIERS),
+    "bottom": sql.SQL(
+        """
+        UPDATE {table}
+        SET position = (SELECT MAX(position) FROM {table} WHERE {page} = %(page)s) + 1
+        WHERE id = %(element)s AND {page} = %(page)s AND {page_owned}
+        """
+    ).format(**BLOCK_SQL_IDENTIFIERS),
+    # Place the element halfway between the `after` element and the block following it
+    # in (position, id) order. Nothing is updated if `after` isn't on the page or
+    # if there's no float left between the two positions, e.g. when they're tied.
+    "after": sql.SQL(
+        """
+        WITH anchor AS (
+            SELECT id, position FROM {table} WHERE id = %(after)s AND {page} = %(page)s
+        ),
+        next AS (
+            SELECT b.position
+            FROM {table} b, anchor
+            WHERE b.{page} = %(page)s
+                AND (b.position, b.id) > (anchor.position, anchor.id)
+                AND b.id <> %(element)s
+            ORDER BY b.position, b.id
+            LIMIT 1
+        ),
+        midpoint AS (
+            SELECT
+                anchor.position AS lower,
+                next.position AS upper,
+                COALESCE((anchor.position + next.position) / 2, anchor.position + 1) AS position
+            FROM anchor LEFT JOIN next ON TRUE
+        )
+        UPDATE {table}
+        SET position = midpoint.position
+        FROM midpoint
+        WHERE id = %(element)s AND {page} = %(page)s AND {page_owned}
+            AND midpoint.position > midpoint.lower
+            AND (midpoint.upper IS NULL OR midpoint.position < midpoint.upper)
+        """
+    ).format(**BLOCK_SQL_IDENTIFIERS),
+}
+
+RENUMBER_BLOCKS_SQL = sql.SQL(
+    """
+    UPDATE {table} b
+    SET position = o.idx
+    FROM (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY position, id) AS idx
+        FROM {table}
+        WHERE {page} = %(page)s
+    ) o
+    WHERE b.id = o.id AND {page_owned}
+    """
+).format(**BLOCK_SQL_IDENTIFIERS)
+
+
+# Locks the user's page like the `set_block_position` trigger(see migration 0007),
+# so that moves and appends on a page run one at a time and can't compute the same
+# MIN/MAX(position). A separate statement, so the move reads positions after the wait.
+LOCK_PAGE_SQL = sql.SQL(
+    """
+    SELECT 1
+    FROM {page_table} p JOIN {notebook_table} n ON n.id = p.notebook_id
+    WHERE p.id = %(page)s AND n.user_id = %(user)s
+    FOR NO KEY UPDATE OF p
+    """
+).format(
+    page_table=sql.Identifier(Page._meta.db_table),
+    notebook_table=sql.Identifier(Notebook._meta.db_table),
+)
+
+# Both the moved block and the `after` block must be on the (user's) page,
+# otherwise a failed "after" move is a no-op rather than a precision problem.
+BLOCKS_ON_PAGE_SQL = sql.SQL(
+    """
+    SELECT COUNT(*) = 2
+    FROM {table}
+    WHERE id IN (%(element)s, %(after)s) AND {page} = %(page)s AND {page_owned}
+    """
+).format(**BLOCK_SQL_IDENTIFIERS)
+
+
+def reposition_block(cur, page_id, user_id, element, position=None, after=None):
+    if position in ("top", "bottom"):
+        kind = position
+    elif after:
+        kind = "after"
     else:
         raise ValueError(
             "At least one of `position`(value=top|bottom) or `after`(uuid) is expected"
         )
+    params = {"element": element, "after": after, "page": page_id, "user": user_id}
+    # No savepoint, only the page lock needs the transaction
+    with transaction.atomic(savepoint=False):
+        cur.execute(LOCK_PAGE_SQL, params)
+        if cur.rowcount == 0:
+            return False
+        cur.execute(REPOSITION_BLOCK_SQL[kind], params)
+        if kind == "after" and cur.rowcount == 0:
+            cur.execute(BLOCKS_ON_PAGE_SQL, params)
+            if not cur.fetchone()[0]:
+                return False
+            # Repeatedly splitting the same gap eventually runs out of float precision
+            # or a tied anchor leaves no gap, spread the page's blocks out and retry.
+            cur.execute(RENUMBER_BLOCKS_SQL, params)
+            cur.execute(REPOSITION_BLOCK_SQL[kind], params)
+        # Whether the block was repositioned, i.e. it's on the user's page
+        return cur.rowcount > 0
@@ -1,7 +1,31 @@
+import copy
+
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
-from .models import Notebook, Page, Block, NotesRecycleBin
+from .models import Notebook, Page, Block, NotesRecycleBin, BlockType, BLOCK_TYPE
+
+
+class CachedFieldsMixin:
+    # For serializers whose fields only depend on `Meta`: introspect the model once
+    # and hand every instance a copy, like DRF does for declared fields.
+    def get_fields(self):
+        cls = type(self)
+        if "_model_fields" not in cls.__dict__:
+            cls._model_fields = super().get_fields()
+        return copy.deepcopy(cls._model_fields)
+
+
+class BlockTypeField(serializers.ChoiceField):
+    # Maps the API's block type names to the stored `BlockType` values
+    def __init__(self, **kwargs):
+        super().__init__(choices=BLOCK_TYPE, **kwargs)
+
+    def to_internal_value(self, data):
+        return BlockType[super().to_internal_value(data).upper()]
+
+    def to_representation(self, value):
+        return BlockType(value).name.lower()
 
 
 class BlockListSerializer(serializers.ModelSerializer):
@@ -12,20 +36,35 @@ class BlockListSerializer(serializers.ModelSerializer):
 
 
 class BlockReadSerializer(serializers.ModelSerializer):
+    block_type = BlockTypeField()
+
     class Meta:
         model = Block
         fields = ["id", "block_type", "content", "metadata"]
         read_only_fields = ["id"]
 
 
+class BlockBulkCreateSerializer(serializers.ListSerializer):
+    def create(self, validated_data):
+        # A single multi-row INSERT, the `set_block_position` trigger
+        # appends the blocks to the page in the given order.
+        return Block.objects.bulk_create(
+            [Block(**item, page_id=self.context["page_id"]) for item in validated_data]
+        )
+
+
 class BlockCreateSerializer(serializers.ModelSerializer):
+    block_type = BlockTypeField()
+
     class Meta:
         model = Block
         fields = ["block_type", "content", "metadata"]
+        list_serializer_class = BlockBulkCreateSerializer
 
     def create(self, validated_data):
-        page = Page.objects.get(pk=self.context["page_id"])
-        return super().create({**validated_data, "page": page})
+        # The `set_block_position` trigger appends the block to the page,
+        # so creating a block is a single INSERT.
+        return super().create({**validated_data, "page_id": self.context["page_id"]})
 
     def to_representation(self, instance):
         return {"id": instance.pk}
@@ -39,8 +78,9 @@ class PageListSerializer(serializers.ModelSerializer):
 
 
 class PageReadSerializer(serializers.ModelSerializer):
-    notebook = serializers.CharField(source="notebook.pk")
-    blocks = serializers.ListField(child=serializers.UUIDField(), source="block_order")
+    # Straight from the page's own column, without loading the notebook
+    notebook = serializers.UUIDField(source="notebook_id", read_only=True)
+    blocks = serializers.SerializerMethodField()
 
     class Meta:
         model = Page
@@ -60,6 +100,10 @@ class PageReadSerializer(serializers.ModelSerializer):
         if not self.context.get("include_block_list"):
             self.fields.pop("blocks")
 
+    def get_blocks(self, instance):
+        # Plain ints from psycopg2, no need for a per-id serializer field.
+        return list(instance.block_ids())
+
 
 class PageCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -67,8 +111,9 @@ class PageCreateSerializer(serializers.ModelSerializer):
         fields = ["title", "preferences"]
 
     def create(self, validated_data):
-        nb = Notebook.objects.get(pk=self.context["notebook_id"])
-        return super().create({**validated_data, "notebook": nb})
+        return super().create(
+            {**validated_data, "notebook_id": self.context["notebook_id"]}
+        )
 
     def to_representation(self, instance):
         return {"id": instance.pk}
@@ -99,11 +144,15 @@ class NotebookDetailSerializer(serializers.ModelSerializer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if self.context.get("include_page_list"):
-            self.fields["pages"] = PageListSerializer(many=True, read_only=True)
+            self.fields["pages"] = serializers.SerializerMethodField()
+
+    def get_pages(self, instance):
+        # Only the listed columns, skips the potentially large `preferences` json
+        return list(instance.pages.values("id", "title", "updated"))
 
 
-class UserSerializer(serializers.ModelSerializer):
-    notebooks = NotebookListSerializer(many=True, read_only=True)
+class UserSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    notebooks = serializers.SerializerMethodField()
 
     class Meta:
         model = get_user_model()
@@ -117,9 +166,14 @@ class UserSerializer(serializers.ModelSerializer):
         ]
         read_only__fields = ["username", "last_login", "notebooks"]
 
+    def get_notebooks(self, instance):
+        # Same output as `NotebookListSerializer`, without a model instance per row
+        return list(instance.notebooks.in_user_order().values("id", "title"))
+
 
 class NotesRecycleBinListSerializer(serializers.ModelSerializer):
-    pages = serializers.SerializerMethodField()
+    pages = serializers.JSONField(source="page_list", read_only=True)
+    # `page_list` is annotated by the viewset's queryset
 
     class Meta:
         model = NotesRecycleBin
@@ -133,20 +187,17 @@ class NotesRecycleBinListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
-    def get_pages(self, instance):
-        if instance.item_type == "notebook":
-            return [
-                {"id": p["id"], "title": p["title"]}
-                for p in instance.item.get("page_items", [])
-            ]
-        elif instance.item_type == "page":
-            return [{"id": instance.item["id"], "title": instance.item["title"]}]
-        else:
-            raise ValueError(f"Invalid item_type: {instance.item_type}")
-
-
-class NotesRecycleBinDetailSerializer(serializers.ModelSerializer):
+
+class NotesRecycleBinDetailSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = NotesRecycleBin
-        fields = "__all__"
-        read_only_fields = [f.name for f in NotesRecycleBin._meta.fields]
+        fields = [
+            "id",
+            "user",
+            "notebook_id",
+            "notebook_title",
+            "item_type",
+            "item",
+            "deleted_on",
+        ]
+        read_only_fields = fields
@@ -69,9 +69,26 @@ DATABASES = {
         "NAME": os.environ.get("DJANGO_DB_NAME", "notes_api"),
         "USER": os.environ.get("DJANGO_DB_USERNAME", "postgres"),
         "PASSWORD": os.environ.get("DJANGO_DB_PASSWORD", "postgres"),
+        # Reuse connections across requests instead of reconnecting for each one
+        "CONN_MAX_AGE": int(os.environ.get("DJANGO_DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+        # Required when connecting through pgbouncer in transaction pooling mode
+        "DISABLE_SERVER_SIDE_CURSORS": os.environ.get(
+            "DJANGO_DB_DISABLE_SERVER_SIDE_CURSORS", "false"
+        ).lower()
+        == "true",
     }
 }
 
+# Opt-in cap on query time(in ms) for the web processes. Leave it unset for
+# `migrate` and `create_sample_data`, which rewrite/copy entire tables.
+if os.environ.get("DJANGO_DB_STATEMENT_TIMEOUT"):
+    DATABASES["default"]["OPTIONS"] = {
+        "options": "-c statement_timeout={}".format(
+            os.environ["DJANGO_DB_STATEMENT_TIMEOUT"]
+        ),
+    }
+
 
 AUTH_USER_MODEL = "api.User"
 
@@ -1,9 +1,13 @@
+import uuid
+
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient, APITestCase
 
-from .models import Notebook, Page, Block
+from .models import Notebook, Page, Block, BlockType, NotesRecycleBin
 
 
 def fmt_dt(dt):
@@ -22,6 +26,29 @@ def setUpModule():
     )
 
 
+class UserAPITest(APITestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.login(username=USERNAME, password=PASSWORD)
+
+    def test_retrieve(self):
+        nbs = Notebook.objects.bulk_create(
+            [Notebook(user=user, title="unb1"), Notebook(user=user, title="unb2")]
+        )
+
+        # The second response is built from the cached serializer fields
+        for _ in range(2):
+            resp = self.client.get(reverse("user"))
+
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.json()["username"], USERNAME)
+            self.assertEqual(
+                resp.json()["notebooks"],
+                [{"id": str(nb.pk), "title": nb.title} for nb in nbs],
+            )
+
+
 class NotebookModelTest(TestCase):
 
     def test_save_and_delete(self):
@@ -46,6 +73,40 @@ class NotebookModelTest(TestCase):
             [nb1.pk, nb3.pk, nb4.pk],
         )
 
+    def test_bulk_create(self):
+        nbs = Notebook.objects.bulk_create(
+            [Notebook(user=user, title="nb1"), Notebook(user=user, title="nb2")]
+        )
+
+        self.assertEqual(
+            User.objects.get(username=USERNAME).custom_notebook_order,
+            [nb.pk for nb in nbs],
+        )
+
+    def test_reposition_notebook(self):
+        nb1 = Notebook.objects.create(user=user, title="nb1")
+        nb2 = Notebook.objects.create(user=user, title="nb2")
+        nb3 = Notebook.objects.create(user=user, title="nb3")
+
+        user.reposition_notebook(nb3.pk, position="top")
+        self.assertEqual(
+            User.objects.get(username=USERNAME).custom_notebook_order,
+            [nb3.pk, nb1.pk, nb2.pk],
+        )
+
+        user.reposition_notebook(nb3.pk, after=nb1.pk)
+        self.assertEqual(
+            User.objects.get(username=USERNAME).custom_notebook_order,
+            [nb1.pk, nb3.pk, nb2.pk],
+        )
+
+        for kwargs in [{"position": "top"}, {"position": "bottom"}, {"after": nb2.pk}]:
+            user.reposition_notebook(uuid.uuid4(), **kwargs)
+        self.assertEqual(
+            User.objects.get(username=USERNAME).custom_notebook_order,
+            [nb1.pk, nb3.pk, nb2.pk],
+        )
+
 
 class NotebookAPITest(APITestCase):
 
@@ -59,17 +120,27 @@ class NotebookAPITest(APITestCase):
                 Notebook(user=user, title="nb4"),
             ]
         )
+        cls.notebook_list = [
+            {"id": str(nb.pk), "title": nb.title} for nb in cls.notebooks
+        ]
 
     def setUp(self):
         self.client = APIClient()
         self.client.login(username=USERNAME, password=PASSWORD)
 
     def test_list(self):
+        with self.assertNumQueries(3):  # session, user, notebooks
+            resp = self.client.get(reverse("notebook-list"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), self.notebook_list)
+
+    def test_list_in_custom_order(self):
+        user.reposition_notebook(self.notebooks[2].pk, position="top")
+
         resp = self.client.get(reverse("notebook-list"))
+
         self.assertEqual(resp.status_code, 200)
-        self.assertEqual(
-            resp.data, [{"id": str(nb.pk), "title": nb.title} for nb in self.notebooks]
-        )
+        self.assertEqual(resp.json(), [self.notebook_list[i] for i in [2, 0, 1, 3]])
 
     def test_retrieve(self):
         nb = self.notebooks[-1]
@@ -91,13 +162,16 @@ class NotebookAPITest(APITestCase):
         pg1 = Page.objects.create(notebook=nb, title="nb1-p1")
         pg2 = Page.objects.create(notebook=nb, title="nb1-p2")
 
-        resp = self.client.get(
-            reverse("notebook-detail", kwargs={"pk": nb.pk}) + "?include_page_list=true"
-        )
+        # session, user, notebook, page list
+        with self.assertNumQueries(4):
+            resp = self.client.get(
+                reverse("notebook-detail", kwargs={"pk": nb.pk})
+                + "?include_page_list=true"
+            )
 
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(
-            resp.data,
+            resp.json(),
             {
                 "id": str(nb.pk),
                 "title": nb.title,
@@ -119,34 +193,499 @@ class NotebookAPITest(APITestCase):
             },
         )
 
+    def test_partial_update(self):
+        nb = self.notebooks[3]
+        pg = Page.objects.create(notebook=nb, title="nb4-p1")
+
+        resp = self.client.patch(
+            reverse("notebook-detail", kwargs={"pk": nb.pk}), {"title": "nb4*"}
+        )
+
+        self.assertEqual(resp.status_code, 200)
+        nb.refresh_from_db()
+        self.assertEqual(nb.title, "nb4*")
+        self.assertEqual(nb.custom_page_order, [pg.pk])
+
+    def test_reposition(self):
+        nb1, nb2, nb3, nb4 = self.notebooks
+
+        with self.assertNumQueries(3):  # session, user, update
+            resp = self.client.post(
+                reverse("notebook-reposition"),
+                {"element": str(nb1.pk), "after": str(nb3.pk)},
+            )
+
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(
+            User.objects.get(username=USERNAME).custom_notebook_order,
+            [nb2.pk, nb3.pk, nb1.pk, nb4.pk],
+        )
+
+        resp = self.client.post(
+            reverse("notebook-reposition"),
+            {"element": str(uuid.uuid4()), "position": "top"},
+        )
+        self.assertEqual(resp.status_code, 404)
+
+    def test_destroy(self):
+        nb = self.notebooks[1]
+        pg1 = Page.objects.create(notebook=nb, title="nb2-p1")
+        pg2 = Page.objects.create(notebook=nb, title="nb2-p2")
+        b1 = Block.objects.create(page=pg1, block_type=BlockType.H1, content="b1")
+        b2 = Block.objects.create(page=pg1, block_type=BlockType.P, content="b2")
+
+        resp = self.client.delete(reverse("notebook-detail", kwargs={"pk": nb.pk}))
+
+        self.assertEqual(resp.status_code, 204)
+        self.assertFalse(Notebook.objects.filter(pk=nb.pk).exists())
+        self.assertNotIn(
+            nb.pk, User.objects.get(username=USERNAME).custom_notebook_order
+        )
+
+        item = NotesRecycleBin.objects.get(notebook_id=nb.pk)
+        self.assertEqual(item.item_type, "notebook")
+        self.assertEqual(item.notebook_title, nb.title)
+        self.assertEqual(item.item["id"], str(nb.pk))
+        self.assertEqual(item.item["created"], fmt_dt(nb.created))
+        self.assertEqual(item.item["updated"], fmt_dt(nb.updated))
+        self.assertEqual(
+            item.item["pages"][0],
+            {"id": str(pg1.pk), "title": pg1.title, "updated": fmt_dt(pg1.updated)},
+        )
+        self.assertEqual(item.item["page_items"][0]["created"], fmt_dt(pg1.created))
+        self.assertEqual(
+            [p["id"] for p in item.item["pages"]], [str(pg1.pk), str(pg2.pk)]
+        )
+        self.assertEqual(
+            [p["blocks"] for p in item.item["page_items"]],
+            [[b1.pk, b2.pk], []],
+        )
+        self.assertEqual(
+            [
+                (b["id"], b["block_type"], b["content"])
+                for b in item.item["page_items"][0]["block_items"]
+            ],
+            [(b1.pk, "h1", "b1"), (b2.pk, "p", "b2")],
+        )
+
+    def test_destroy_num_queries(self):
+        nb = self.notebooks[2]
+        for i in range(5):
+            pg = Page.objects.create(notebook=nb, title=f"nb3-p{i}")
+            Block.objects.bulk_create(
+                [Block(page=pg, block_type=BlockType.P) for _ in range(3)]
+            )
+
+        # session, user, notebook, savepoint, archive, order array, page ids,
+        # one DELETE each for blocks, pages and the notebook, savepoint release
+        # - independent of the number of pages and blocks.
+        with self.assertNumQueries(11):
+            resp = self.client.delete(
+                reverse("notebook-detail", kwargs={"pk": nb.pk})
+            )
+        self.assertEqual(resp.status_code, 204)
+
 
 class PageModelTest(TestCase):
     def test_reposition_block(self):
         nb = Notebook.objects.create(user=user, title="pgtnb")
         page = Page.objects.create(notebook=nb, title="pgt1")
-        b1 = Block.objects.create(block_type="h1", page=page).pk
-        b2 = Block.objects.create(block_type="h1", page=page).pk
-        b3 = Block.objects.create(block_type="h1", page=page).pk
-        b4 = Block.objects.create(block_type="h1", page=page).pk
-        b5 = Block.objects.create(block_type="h1", page=page).pk
+        b1 = Block.objects.create(block_type=BlockType.H1, page=page).pk
+        b2 = Block.objects.create(block_type=BlockType.H1, page=page).pk
+        b3 = Block.objects.create(block_type=BlockType.H1, page=page).pk
+        b4 = Block.objects.create(block_type=BlockType.H1, page=page).pk
+        b5 = Block.objects.create(block_type=BlockType.H1, page=page).pk
 
-        self.assertEqual(Page.objects.get(pk=page.pk).block_order, [b1, b2, b3, b4, b5])
+        self.assertEqual(list(page.block_ids()), [b1, b2, b3, b4, b5])
 
         page.reposition_block(b3, position="top")
-        self.assertEqual(Page.objects.get(pk=page.pk).block_order, [b3, b1, b2, b4, b5])
+        self.assertEqual(list(page.block_ids()), [b3, b1, b2, b4, b5])
 
         page.reposition_block(b3, position="top")
-        self.assertEqual(Page.objects.get(pk=page.pk).block_order, [b3, b1, b2, b4, b5])
+        self.assertEqual(list(page.block_ids()), [b3, b1, b2, b4, b5])
 
         page.reposition_block(b1, position="bottom")
-        self.assertEqual(Page.objects.get(pk=page.pk).block_order, [b3, b2, b4, b5, b1])
+        self.assertEqual(list(page.block_ids()), [b3, b2, b4, b5, b1])
 
         page.reposition_block(b5, after=b2)
-        self.assertEqual(Page.objects.get(pk=page.pk).block_order, [b3, b2, b5, b4, b1])
+        self.assertEqual(list(page.block_ids()), [b3, b2, b5, b4, b1])
 
         page.reposition_block(b2, after=b1)
-        self.assertEqual(Page.objects.get(pk=page.pk).block_order, [b3, b5, b4, b1, b2])
+        self.assertEqual(list(page.block_ids()), [b3, b5, b4, b1, b2])
 
         page.reposition_block(b2, after=b1)
-        self.assertEqual(Page.objects.get(pk=page.pk).block_order, [b3, b5, b4, b1, b2])
+        self.assertEqual(list(page.block_ids()), [b3, b5, b4, b1, b2])
+
+        # A missing anchor doesn't renumber the page's blocks
+        positions = page.blocks.order_by("id").values_list("id", "position")
+        before = list(positions)
+        with self.assertNumQueries(3):  # page lock, failed update, anchor lookup
+            page.reposition_block(b4, after=b5 + 1000)
+        self.assertEqual(list(positions.all()), before)
+        self.assertEqual(list(page.block_ids()), [b3, b5, b4, b1, b2])
+
+    def test_reposition_block_after_tied_block(self):
+        nb = Notebook.objects.create(user=user, title="pgtnb")
+        page = Page.objects.create(notebook=nb, title="pgt1")
+        b1, b2, b3 = [
+            Block.objects.create(block_type=BlockType.P, page=page).pk for _ in range(3)
+        ]
+        Block.objects.filter(pk__in=[b1, b2]).update(position=1)
+
+        page.reposition_block(b3, after=b1)
+        self.assertEqual(list(page.block_ids()), [b1, b3, b2])
+
+    def test_reposition_block_after_same_block(self):
+        nb = Notebook.objects.create(user=user, title="pgtnb")
+        page = Page.objects.create(notebook=nb, title="pgt1")
+        blocks = Block.objects.bulk_create(
+            [Block(block_type=BlockType.P, page=page) for _ in range(100)]
+        )
+        first, *rest = [b.pk for b in blocks]
+
+        # Halves the gap after `first` on every move, more often than a float allows
+        for b in rest:
+            page.reposition_block(b, after=first)
+        self.assertEqual(list(page.block_ids()), [first, *reversed(rest)])
+
+
+class PageAPITest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        nb = Notebook.objects.create(user=user, title="pgtnb")
+        cls.page = Page.objects.create(notebook=nb, title="pgt1")
+        cls.blocks = Block.objects.bulk_create(
+            [
+                Block(block_type=BlockType.H1, page=cls.page),
+                Block(block_type=BlockType.P, page=cls.page),
+            ]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.login(username=USERNAME, password=PASSWORD)
+
+    def test_retrieve_with_block_list(self):
+        page = self.page
+        # session, user, page, block ids
+        with self.assertNumQueries(4):
+            resp = self.client.get(
+                reverse("page-detail", kwargs={"pk": page.pk})
+                + "?include_block_list=true"
+            )
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp.data,
+            {
+                "id": str(page.pk),
+                "notebook": str(page.notebook_id),
+                "title": page.title,
+                "created": fmt_dt(page.created),
+                "updated": fmt_dt(page.updated),
+                "preferences": page.preferences,
+                "blocks": [b.pk for b in self.blocks],
+            },
+        )
+
+    def test_destroy(self):
+        page = Page.objects.create(notebook=self.page.notebook, title="pgt2")
+        b1 = Block.objects.create(page=page, block_type=BlockType.H1, content="b1")
+        b2 = Block.objects.create(page=page, block_type=BlockType.P, content="b2")
+
+        # session, user, page, savepoint, archive, page order,
+        # blocks, page, savepoint release - the notebook is never loaded.
+        with self.assertNumQueries(9):
+            resp = self.client.delete(reverse("page-detail", kwargs={"pk": page.pk}))
+
+        self.assertEqual(resp.status_code, 204)
+        self.assertFalse(Page.objects.filter(pk=page.pk).exists())
+        item = NotesRecycleBin.objects.get(item_type="page", item__id=str(page.pk))
+        self.assertEqual(item.notebook_title, page.notebook.title)
+        self.assertEqual(item.item["blocks"], [b1.pk, b2.pk])
+        self.assertEqual(item.item["created"], fmt_dt(page.created))
+        self.assertEqual(item.item["updated"], fmt_dt(page.updated))
+        self.assertEqual(
+            [(b["id"], b["block_type"], b["content"]) for b in item.item["block_items"]],
+            [(b1.pk, "h1", "b1"), (b2.pk, "p", "b2")],
+        )
+
+    def test_create(self):
+        nb = self.page.notebook
+        resp = self.client.post(
+            reverse("page-list", kwargs={"notebook_id": nb.pk}), {"title": "pgt2"}
+        )
+
+        self.assertEqual(resp.status_code, 201)
+        nb.refresh_from_db()
+        self.assertEqual(nb.custom_page_order, [self.page.pk, resp.data["id"]])
+
+    def test_other_users_page(self):
+        User.objects.create_user(username="other", password="other")
+        self.client.login(username="other", password="other")
+
+        resp = self.client.get(reverse("page-detail", kwargs={"pk": self.page.pk}))
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.delete(reverse("page-detail", kwargs={"pk": self.page.pk}))
+        self.assertEqual(resp.status_code, 404)
+        block_url = reverse("block-list", kwargs={"page_id": self.page.pk})
+        resp = self.client.get(block_url)
+        self.assertEqual(resp.json(), [])
+
+        page_url = reverse("page-list", kwargs={"notebook_id": self.page.notebook_id})
+        resp = self.client.post(page_url, {"title": "intruder"})
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.post(block_url, {"block_type": "p", "content": "b"})
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.post(block_url, [{"block_type": "p", "content": "b"}])
+        self.assertEqual(resp.status_code, 404)
+        self.assertEqual(
+            Notebook.objects.get(pk=self.page.notebook_id).custom_page_order,
+            [self.page.pk],
+        )
+        self.assertEqual(list(self.page.block_ids()), [b.pk for b in self.blocks])
+
+    def test_move_pages(self):
+        src = Notebook.objects.create(user=user, title="src")
+        dest = Notebook.objects.create(user=user, title="dest")
+        other = Notebook.objects.create(user=user, title="other")
+        p1, p2, p3, p4 = [
+            Page.objects.create(notebook=src, title=f"p{i}") for i in range(1, 5)
+        ]
+        d1 = Page.objects.create(notebook=dest, title="d1")
+        o1 = Page.objects.create(notebook=other, title="o1")
+
+        resp = self.client.post(
+            reverse("move-pages"),
+            {
+                "source_notebook": str(src.pk),
+                "destination_notebook": str(uuid.uuid4()),
+                "pages": [str(p1.pk)],
+            },
+        )
+        self.assertEqual(resp.status_code, 404)
+
+        with self.assertNumQueries(4):  # session, user, count, move
+            resp = self.client.post(
+                reverse("move-pages"),
+                {
+                    "source_notebook": str(src.pk),
+                    "destination_notebook": str(dest.pk),
+                    "pages": [str(p3.pk), str(p1.pk), str(o1.pk)],
+                },
+            )
+
+        self.assertEqual(resp.status_code, 204)
+        src.refresh_from_db()
+        dest.refresh_from_db()
+        self.assertEqual(src.custom_page_order, [p2.pk, p4.pk])
+        self.assertEqual(dest.custom_page_order, [d1.pk, p3.pk, p1.pk])
+        self.assertEqual(
+            set(dest.pages.values_list("id", flat=True)), {d1.pk, p3.pk, p1.pk}
+        )
+        self.assertEqual(Page.objects.get(pk=o1.pk).notebook_id, other.pk)
+
+    def test_reposition_page(self):
+        nb = Notebook.objects.create(user=user, title="rpnb")
+        p1, p2, p3 = [
+            Page.objects.create(notebook=nb, title=f"p{i}") for i in range(3)
+        ]
+        other_user = User.objects.create_user(username="other", password="other")
+        other_nb = Notebook.objects.create(user=other_user, title="other")
+        o1, o2 = [
+            Page.objects.create(notebook=other_nb, title=f"o{i}") for i in range(2)
+        ]
+
+        with self.assertNumQueries(3):  # session, user, update
+            resp = self.client.post(
+                reverse("page-reposition", kwargs={"notebook_id": nb.pk}),
+                {"element": str(p3.pk), "position": "top"},
+            )
+        self.assertEqual(resp.status_code, 204)
+        nb.refresh_from_db()
+        self.assertEqual(nb.custom_page_order, [p3.pk, p1.pk, p2.pk])
+
+        resp = self.client.post(
+            reverse("page-reposition", kwargs={"notebook_id": other_nb.pk}),
+            {"element": str(o2.pk), "position": "top"},
+        )
+        self.assertEqual(resp.status_code, 404)
+        other_nb.refresh_from_db()
+        self.assertEqual(other_nb.custom_page_order, [o1.pk, o2.pk])
+
+        resp = self.client.post(
+            reverse("page-reposition", kwargs={"notebook_id": uuid.uuid4()}),
+            {"element": str(p1.pk), "position": "top"},
+        )
+        self.assertEqual(resp.status_code, 404)
+
+    def test_reposition_block(self):
+        b1, b2 = [b.pk for b in self.blocks]
+        url = reverse("block-reposition", kwargs={"page_id": self.page.pk})
+
+        with self.assertNumQueries(4):  # session, user, page lock, update
+            resp = self.client.post(url, {"element": b2, "position": "top"})
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(list(self.page.block_ids()), [b2, b1])
+
+        resp = self.client.post(url, {"element": b2, "after": b1 + 1000})
+        self.assertEqual(resp.status_code, 404)
+
+        User.objects.create_user(username="other", password="other")
+        self.client.login(username="other", password="other")
+        resp = self.client.post(url, {"element": b1, "position": "top"})
+        self.assertEqual(resp.status_code, 404)
+        self.assertEqual(list(self.page.block_ids()), [b2, b1])
+
+
+class BlockAPITest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        nb = Notebook.objects.create(user=user, title="bltnb")
+        cls.page = Page.objects.create(notebook=nb, title="blt1")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.login(username=USERNAME, password=PASSWORD)
+
+    def test_create(self):
+        url = reverse("block-list", kwargs={"page_id": self.page.pk})
+        resp1 = self.client.post(url, {"block_type": "h1", "content": "b1"})
+        resp2 = self.client.post(url, {"block_type": "p", "content": "b2"})
+
+        self.assertEqual(resp1.status_code, 201)
+        self.assertEqual(resp2.status_code, 201)
+        self.assertEqual(
+            list(self.page.block_ids()),
+            [resp1.data["id"], resp2.data["id"]],
+        )
+
+    def test_list(self):
+        blocks = Block.objects.bulk_create(
+            [Block(block_type=BlockType.P, page=self.page) for _ in range(3)]
+        )
+        page = self.page
+        page.reposition_block(blocks[2].pk, position="top")
+
+        with self.assertNumQueries(3):  # session, user, block ids
+            resp = self.client.get(reverse("block-list", kwargs={"page_id": page.pk}))
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp.json(), [{"id": b.pk} for b in [blocks[2], blocks[0], blocks[1]]]
+        )
+
+    def test_partial_update(self):
+        b1 = Block.objects.create(block_type=BlockType.P, page=self.page)
+        b1.refresh_from_db()
+        position = b1.position
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.patch(
+                reverse("block-detail", kwargs={"pk": b1.pk}), {"content": "b1*"}
+            )
+
+        self.assertEqual(resp.status_code, 200)
+        b1.refresh_from_db()
+        self.assertEqual(b1.content, "b1*")
+        self.assertEqual(b1.position, position)
+        [update] = [
+            q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")
+        ]
+        self.assertNotIn('"position"', update)
+
+    def test_bulk_create(self):
+        url = reverse("block-list", kwargs={"page_id": self.page.pk})
+        resp = self.client.post(
+            url,
+            [
+                {"block_type": "h1", "content": "b1"},
+                {"block_type": "p", "content": "b2"},
+                {"block_type": "p", "content": "b3"},
+            ],
+        )
+
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(len(resp.data), 3)
+        self.assertEqual(
+            list(self.page.block_ids()), [item["id"] for item in resp.data]
+        )
+
+
+class NotesRecycleBinModelTest(TestCase):
+
+    def test_archive_pages(self):
+        nb = Notebook.objects.create(user=user, title="arnb")
+        pages = Page.objects.bulk_create(
+            [Page(notebook=nb, title=f"ar{i}") for i in range(3)]
+        )
+        Block.objects.create(page=pages[0], block_type=BlockType.P, content="b1")
+
+        ids = NotesRecycleBin.archive_pages([pg.pk for pg in pages])
+
+        items = NotesRecycleBin.objects.filter(pk__in=ids).order_by("item__title")
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(
+            [(item.item_type, item.item["id"]) for item in items],
+            [("page", str(pg.pk)) for pg in pages],
+        )
+        self.assertEqual(
+            [len(item.item["block_items"]) for item in items], [1, 0, 0]
+        )
+
+
+class NotesRecycleBinAPITest(APITestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.login(username=USERNAME, password=PASSWORD)
+
+    def test_list(self):
+        nb1 = Notebook.objects.create(user=user, title="rbtnb1")
+        pg1 = Page.objects.create(notebook=nb1, title="rbt1")
+        pg2 = Page.objects.create(notebook=nb1, title="rbt2")
+        nb2 = Notebook.objects.create(user=user, title="rbtnb2")
+        pg3 = Page.objects.create(notebook=nb2, title="rbt3")
+
+        self.client.delete(reverse("page-detail", kwargs={"pk": pg3.pk}))
+        self.client.delete(reverse("notebook-detail", kwargs={"pk": nb1.pk}))
+        resp = self.client.get(reverse("recyclebin-list"))
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            [(item["item_type"], item["pages"]) for item in resp.data["results"]],
+            [
+                ("page", [{"id": str(pg3.pk), "title": pg3.title}]),
+                (
+                    "notebook",
+                    [
+                        {"id": str(pg1.pk), "title": pg1.title},
+                        {"id": str(pg2.pk), "title": pg2.title},
+                    ],
+                ),
+            ],
+        )
+
+    def test_retrieve(self):
+        nb = Notebook.objects.create(user=user, title="rbtnb3")
+        pg = Page.objects.create(notebook=nb, title="rbt4")
+        self.client.delete(reverse("page-detail", kwargs={"pk": pg.pk}))
+        item = NotesRecycleBin.objects.get(notebook_id=nb.pk)
 
+        for _ in range(2):
+            resp = self.client.get(reverse("recyclebin-detail", kwargs={"pk": item.pk}))
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(
+                resp.json(),
+                {
+                    "id": str(item.pk),
+                    "user": user.pk,
+                    "notebook_id": str(nb.pk),
+                    "notebook_title": nb.title,
+                    "item_type": "page",
+                    "item": item.item,
+                    "deleted_on": fmt_dt(item.deleted_on),
+                },
+            )
@@ -40,7 +40,7 @@ from api import views
 # /pages/<page_id>/blocks
 # GET page's block ids
 #     Query Params: pagination, prefetch blocks details
-# POST add a new block
+# POST add a new block, or a list of blocks
 #
 # /pages/<page_id>/blocks/reposition
 # POST reposition a block within the same page
@@ -89,7 +89,7 @@ api_urls = [
         views.reposition_block,
         name="block-reposition",
     ),
-    path("blocks/<uuid:pk>", views.BlockDetailView.as_view(), name="block-detail"),
+    path("blocks/<int:pk>", views.BlockDetailView.as_view(), name="block-detail"),
 ]
 
 
@@ -1,5 +1,7 @@
-from django.db import transaction, connection
+from django.db import transaction
+from django.http import Http404
 from rest_framework.decorators import action, api_view
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework import generics, mixins, viewsets
 
@@ -20,54 +22,42 @@ from .serializers import (
 )
 
 
+# Accepted spellings of a true query param flag, a set lookup instead of lowercasing
+TRUE_VALUES = frozenset(["true", "True", "TRUE", "1", "yes"])
+
+
+def query_param_flag(request, name):
+    return request.query_params.get(name) in TRUE_VALUES
+
+
 @api_view(["GET"])
 def user(request):
     return Response(UserSerializer(request.user).data)
 
 
-# TODO: Use psycopg2.sql for raw SQL
 @api_view(["POST"])
 def move_pages(request):
-    nbs = request.user.notebooks.filter(
-        pk__in=[request.data["source_notebook"], request.data["destination_notebook"]]
+    src_nb_id = request.data["source_notebook"]
+    dest_nb_id = request.data["destination_notebook"]
+    # Both notebooks must be distinct and belong to the user, only their ids are needed
+    nbs = Notebook.objects.for_user(request.user).filter(
+        pk__in=[src_nb_id, dest_nb_id]
     )
-    if len(nbs) != 2:
+    if nbs.count() != 2:
         return Response(status=404)
 
-    src_nb = nbs.get(pk=request.data["source_notebook"])
-    dest_nb = nbs.get(pk=request.data["destination_notebook"])
-    pages = request.data["pages"]
-    with transaction.atomic(), connection.cursor() as cur:
-        cur.execute(
-            f"UPDATE {Page._meta.db_table} SET notebook_id = %s WHERE id = ANY(%s::uuid[])",
-            (dest_nb.pk, list(pages)),
-        )
-        cur.execute(
-            f"""
-            UPDATE {Notebook._meta.db_table}
-            SET custom_page_order = ARRAY(
-                SELECT UNNEST(custom_page_order)
-                EXCEPT
-                SELECT UNNEST(%s::uuid[])
-            )
-            WHERE id = %s
-            """,
-            (list(pages), src_nb.pk),
-        )
-        cur.execute(
-            f"""
-            UPDATE {Notebook._meta.db_table}
-            SET custom_page_order = ARRAY_CAT(custom_page_order, %s::uuid[])
-            WHERE id = %s
-            """,
-            (list(pages), dest_nb.pk),
-        )
+    Notebook.move_pages(src_nb_id, dest_nb_id, list(request.data["pages"]))
     return Response(status=204)
 
 
 class NotebookViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
-        return Notebook.objects.filter(user=self.request.user)
+        # The serializers never read `custom_page_order`, which grows with the
+        # notebook. Leaving it deferred also keeps `save()` from writing back
+        # a stale copy over pages appended by the trigger in the meantime.
+        # `user` is only filtered on, not selected - the list joins `api_user`
+        # just to order by `custom_notebook_order`(see `in_user_order`).
+        return Notebook.objects.for_user(self.request.user).defer("custom_page_order")
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -80,43 +70,40 @@ class NotebookViewSet(viewsets.ModelViewSet):
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
         ctx["user"] = self.request.user
-        flag = self.request.query_params.get("include_page_list", "").lower()
-        ctx["include_page_list"] = flag == "true"
+        ctx["include_page_list"] = query_param_flag(self.request, "include_page_list")
         return ctx
 
+    def list(self, request, *args, **kwargs):
+        # Ids and titles straight from the cursor as dicts,
+        # no model instances or per-row serializer fields
+        qs = self.get_queryset().in_user_order()
+        return Response(list(qs.values("id", "title")))
+
     def perform_destroy(self, instance):
-        serialized_nb = NotebookDetailSerializer(
-            instance, context={"include_page_list": True}
-        ).data
-        serialized_nb["page_items"] = [
-            PageReadSerializer(page, context={"include_block_list": True}).data
-            for page in instance.pages.all()
-        ]
         with transaction.atomic():
-            NotesRecycleBin.objects.create(
-                user=self.request.user,
-                notebook_id=str(instance.pk),
-                notebook_title=instance.title,
-                item_type="notebook",
-                item=serialized_nb,
-            )
+            NotesRecycleBin.archive_notebook(instance)
             super().perform_destroy(instance)
 
     @action(detail=False, methods=["POST"])
     def reposition(self, request):
         payload = request.data
-        request.user.reposition_notebook(
+        repositioned = request.user.reposition_notebook(
             payload["element"],
             position=payload.get("position"),
             after=payload.get("after"),
         )
-        return Response(status=204)
+        return Response(status=204 if repositioned else 404)
 
 
 class PageListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
-        return Page.objects.filter(notebook__pk=self.kwargs["notebook_id"])
+        return Page.objects.for_user(self.request.user).filter(
+            notebook_id=self.kwargs["notebook_id"]
+        )
+
+    def list(self, request, *args, **kwargs):
+        return Response(list(self.get_queryset().values("id", "title", "updated")))
 
     def get_serializer_class(self):
         if self.request.method == "GET":
@@ -129,53 +116,55 @@ class PageListCreateView(generics.ListCreateAPIView):
         ctx["notebook_id"] = self.kwargs["notebook_id"]
         return ctx
 
+    def perform_create(self, serializer):
+        # The notebook comes straight from the url, it must be one of the user's
+        notebooks = Notebook.objects.for_user(self.request.user)
+        if not notebooks.filter(pk=self.kwargs["notebook_id"]).exists():
+            raise Http404
+        super().perform_create(serializer)
+
 
 @api_view(["POST"])
 def reposition_page(request, notebook_id, *args, **kwargs):
     payload = request.data
-    nb = Notebook.objects.get(pk=notebook_id)
-    nb.reposition_page(
+    # Not loaded, the UPDATE only touches the notebook if it belongs to the user
+    nb = Notebook(pk=notebook_id, user=request.user)
+    repositioned = nb.reposition_page(
         payload["element"],
         position=payload.get("position"),
         after=payload.get("after"),
     )
-    return Response(status=204)
+    # Nothing matched: not the user's notebook, or the pages aren't in it
+    return Response(status=204 if repositioned else 404)
 
 
 class PageDetailView(
     generics.RetrieveAPIView, generics.UpdateAPIView, generics.DestroyAPIView
 ):
-    queryset = Page.objects.all()
     serializer_class = PageReadSerializer
 
+    def get_queryset(self):
+        return Page.objects.for_user(self.request.user)
+
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
-        flag = self.request.query_params.get("include_block_list", "").lower()
-        ctx["include_block_list"] = flag == "true"
+        ctx["include_block_list"] = query_param_flag(self.request, "include_block_list")
         return ctx
 
     def perform_destroy(self, instance):
-        serialized_page = PageReadSerializer(
-            instance, context={"include_block_list": True}
-        ).data
-        serialized_page["block_items"] = [
-            BlockReadSerializer(block).data for block in instance.blocks.all()
-        ]
         with transaction.atomic():
-            NotesRecycleBin.objects.create(
-                user=self.request.user,
-                notebook_id=str(instance.notebook.pk),
-                notebook_title=instance.notebook.title,
-                item_type="page",
-                item=serialized_page,
-            )
+            NotesRecycleBin.archive_page(instance)
             super().perform_destroy(instance)
 
 
 class BlockListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
-        return Block.objects.filter(page__pk=self.kwargs["page_id"])
+        return (
+            Block.objects.for_user(self.request.user)
+            .filter(page_id=self.kwargs["page_id"])
+            .in_page_order()
+        )
 
     def get_serializer_class(self):
         if self.request.method == "GET":
@@ -183,37 +172,67 @@ class BlockListCreateView(generics.ListCreateAPIView):
         else:
             return BlockCreateSerializer
 
+    def list(self, request, *args, **kwargs):
+        return Response(list(self.get_queryset().values("id")))
+
+    def get_serializer(self, *args, **kwargs):
+        if isinstance(kwargs.get("data"), list):
+            kwargs["many"] = True
+        return super().get_serializer(*args, **kwargs)
+
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
         ctx["page_id"] = self.kwargs["page_id"]
         return ctx
 
+    def perform_create(self, serializer):
+        # The page comes straight from the url, it must be one of the user's
+        pages = Page.objects.for_user(self.request.user)
+        if not pages.filter(pk=self.kwargs["page_id"]).exists():
+            raise Http404
+        super().perform_create(serializer)
+
 
 @api_view(["POST"])
 def reposition_block(request, page_id):
     payload = request.data
-    page = Page.objects.get(page_id)
-    page.reposition_block(
+    # Not loaded, the UPDATE only touches the page if it belongs to the user
+    page = Page(pk=page_id)
+    repositioned = page.reposition_block(
         payload["element"],
         position=payload.get("position"),
         after=payload.get("after"),
+        user_id=request.user.pk,
     )
-    return Response(status=204)
+    # Nothing matched: not the user's page, or the blocks aren't on it
+    return Response(status=204 if repositioned else 404)
 
 
 class BlockDetailView(
     generics.RetrieveAPIView, generics.UpdateAPIView, generics.DestroyAPIView
 ):
-    queryset = Block.objects.all()
     serializer_class = BlockReadSerializer
 
+    def get_queryset(self):
+        # `position` isn't serialized, deferring it keeps `save()` from writing back
+        # a stale copy over a concurrent reposition.
+        return Block.objects.for_user(self.request.user).defer("position")
+
+
+class NotesRecycleBinPagination(CursorPagination):
+    # Keyset pagination on the (user, deleted_on) index, no OFFSET scans
+    ordering = "deleted_on"
+    page_size = 50
+
 
 class NotesRecycleBinViewSet(viewsets.ReadOnlyModelViewSet):
+    pagination_class = NotesRecycleBinPagination
 
     def get_queryset(self):
-        return NotesRecycleBin.objects.filter(user=self.request.user).order_by(
-            "deleted_on"
-        )
+        qs = NotesRecycleBin.objects.for_user(self.request.user)
+        if self.action == "list":
+            qs = qs.with_page_list()
+        return qs
 
     def get_serializer_class(self):
         if self.action == "list":